@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Embedding Model Export Script for the Semantic Cache
+
+Exports sentence-transformers/all-MiniLM-L6-v2 to ONNX and quantizes it to
+int8 (dynamic, AVX2) so the semantic cache can run it with onnxruntime alone,
+without loading PyTorch at startup. Run once at build time:
+
+    pip install "optimum[onnxruntime]"
+    python export_embedding_model.py ./models/all-MiniLM-L6-v2
+
+then set AI_SEMANTIC_CACHE_MODEL=./models/all-MiniLM-L6-v2.
+"""
+
+import sys
+from pathlib import Path
+
+MODEL_ID = "sentence-transformers/all-MiniLM-L6-v2"
+DEFAULT_OUTPUT_DIR = "models/all-MiniLM-L6-v2"
+
+def export_model(output_dir: Path):
+    """Export the model and tokenizer, then write an int8 model_quantized.onnx next to them"""
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+
+    print(f"📦 Exporting {MODEL_ID} to ONNX...")
+    model = ORTModelForFeatureExtraction.from_pretrained(MODEL_ID, export=True)
+    model.save_pretrained(output_dir)
+    AutoTokenizer.from_pretrained(MODEL_ID).save_pretrained(output_dir)
+
+    print("🔧 Quantizing to int8 (dynamic, AVX2)...")
+    quantizer = ORTQuantizer.from_pretrained(model)
+    quantization_config = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+    quantizer.quantize(save_dir=output_dir, quantization_config=quantization_config)
+
+    print(f"✅ Model written to {output_dir}")
+
+def main():
+    output_dir = Path(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_OUTPUT_DIR)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    export_model(output_dir)
+
+if __name__ == "__main__":
+    main()
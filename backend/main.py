@@ -1,23 +1,48 @@
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, DateTime
-from sqlalchemy.orm import sessionmaker, Session, declarative_base
-from pydantic import BaseModel, ConfigDict, Field, field_validator
+from fastapi.responses import ORJSONResponse, Response
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Index, event, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
+from pydantic import BaseModel, ConfigDict, Field
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import List, Optional
+from typing import Annotated, List, Optional
 import logging
 import os
+import msgspec
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
-from ai_service import ai_service, TodoGenerationRequest, TodoGenerationResult
+from ai_service import ai_service, close_http_client, TodoGenerationRequest, TodoGenerationResult
+
+def get_async_database_url(url: str) -> str:
+    """Map a database URL onto its asyncio driver (aiosqlite / asyncpg)"""
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    if url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql+asyncpg://", 1)
+    return url
 
 # Database setup
-SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./todos.db")
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SQLALCHEMY_DATABASE_URL = get_async_database_url(os.getenv("DATABASE_URL", "sqlite:///./todos.db"))
+if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
+    engine = create_async_engine(SQLALCHEMY_DATABASE_URL)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        # WAL with synchronous=NORMAL fsyncs on checkpoints instead of every commit
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+else:
+    engine = create_async_engine(SQLALCHEMY_DATABASE_URL, pool_size=20, max_overflow=10)
+SessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
 # Database models
@@ -25,42 +50,43 @@ class Todo(Base):
     __tablename__ = "todos"
     
     id = Column(Integer, primary_key=True, index=True)
-    title = Column(String, index=True)
+    title = Column(String)
     description = Column(String, nullable=True)
     completed = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, nullable=True, onupdate=datetime.now)
     priority = Column(Integer, default=0)
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+    # Match the list endpoints' filters so they read rows already sorted by created_at
+    __table_args__ = (
+        Index("ix_todos_completed_created", "completed", "created_at"),
+        Index("ix_todos_priority_created", "priority", "created_at"),
+        Index("ix_todos_created_at", "created_at"),
+    )
+
+def create_schema(conn):
+    """Create missing tables and indexes (indexes are also added to existing tables)"""
+    Base.metadata.create_all(conn)
+    # Databases created before the composite indexes still carry the unused title index
+    conn.execute(text("DROP INDEX IF EXISTS ix_todos_title"))
+    for index in Todo.__table__.indexes:
+        index.create(conn, checkfirst=True)
 
 # Pydantic models
+# 0 = low, 1 = medium, 2 = high; the bounds are checked by pydantic-core itself
+Priority = Annotated[int, Field(ge=0, le=2)]
+
 class TodoCreate(BaseModel):
     title: str
     description: Optional[str] = None
     completed: bool = False
-    priority: int = Field(default=0, ge=0, le=2)
-    
-    @field_validator('priority')
-    @classmethod
-    def validate_priority(cls, v):
-        if v < 0 or v > 2:
-            raise ValueError('Priority must be between 0 and 2')
-        return v
+    priority: Priority = 0
 
 class TodoUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
     completed: Optional[bool] = None
-    priority: Optional[int] = Field(None, ge=0, le=2)
-    
-    @field_validator('priority')
-    @classmethod
-    def validate_priority(cls, v):
-        if v is not None and (v < 0 or v > 2):
-            raise ValueError('Priority must be between 0 and 2')
-        return v
+    priority: Optional[Priority] = None
 
 class TodoResponse(BaseModel):
     id: int
@@ -73,12 +99,51 @@ class TodoResponse(BaseModel):
     
     model_config = ConfigDict(from_attributes=True)
 
+class TodoRecord(msgspec.Struct, gc=False):
+    """List item encoded by msgspec; mirrors TodoResponse field for field"""
+    id: int
+    title: str
+    description: Optional[str]
+    completed: bool
+    priority: int
+    created_at: datetime
+    updated_at: Optional[datetime]
+
+def todo_list_response(todos: List[Todo]) -> Response:
+    """Encode ORM rows straight to JSON with msgspec, bypassing Pydantic"""
+    records = [
+        TodoRecord(
+            id=todo.id,
+            title=todo.title,
+            description=todo.description,
+            completed=todo.completed,
+            priority=todo.priority,
+            created_at=todo.created_at,
+            updated_at=todo.updated_at,
+        )
+        for todo in todos
+    ]
+    return Response(content=msgspec.json.encode(records), media_type="application/json")
+
+# List endpoints skip response_model validation; the schema is only declared for the docs
+TODO_LIST_RESPONSES = {200: {"model": List[TodoResponse]}}
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create tables
+    async with engine.begin() as conn:
+        await conn.run_sync(create_schema)
+    yield
+    await ai_service.aclose()
+    await close_http_client()
+    await engine.dispose()
+
 # FastAPI app
-app = FastAPI(title="Todo API", version="1.0.0")
+app = FastAPI(title="Todo API", version="1.0.0", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # CORS middleware
 app.add_middleware(
@@ -95,12 +160,9 @@ app.add_middleware(
 )
 
 # Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 # API Routes
 @app.get("/")
@@ -108,40 +170,43 @@ async def root():
     return {"message": "Todo API is running"}
 
 @app.post("/todos", response_model=TodoResponse)
-async def create_todo(todo: TodoCreate, db: Session = Depends(get_db)):
-    db_todo = Todo(title=todo.title, description=todo.description, completed=todo.completed, priority=todo.priority)
-    db.add(db_todo)
-    db.commit()
-    db.refresh(db_todo)
+async def create_todo(todo: TodoCreate, db: AsyncSession = Depends(get_db)):
+    # INSERT ... RETURNING gets the stored row back without a separate refresh SELECT
+    db_todo = await db.scalar(
+        insert(Todo)
+        .values(title=todo.title, description=todo.description, completed=todo.completed, priority=todo.priority)
+        .returning(Todo)
+    )
+    await db.commit()
     return db_todo
 
-@app.get("/todos", response_model=List[TodoResponse])
-async def get_todos(db: Session = Depends(get_db)):
-    todos = db.query(Todo).order_by(Todo.created_at.desc()).all()
-    return todos    
+@app.get("/todos", response_model=None, responses=TODO_LIST_RESPONSES)
+async def get_todos(db: AsyncSession = Depends(get_db)):
+    todos = await db.scalars(select(Todo).order_by(Todo.created_at.desc()))
+    return todo_list_response(todos)
 
-@app.get("/todos/completed", response_model=List[TodoResponse])
-async def get_completed_todos(db: Session = Depends(get_db)):
-    todos = db.query(Todo).filter(Todo.completed == True).order_by(Todo.created_at.desc()).all()
-    return todos
+@app.get("/todos/completed", response_model=None, responses=TODO_LIST_RESPONSES)
+async def get_completed_todos(db: AsyncSession = Depends(get_db)):
+    todos = await db.scalars(select(Todo).where(Todo.completed == True).order_by(Todo.created_at.desc()))
+    return todo_list_response(todos)
 
-@app.get("/todos/priority/{priority}", response_model=List[TodoResponse])
-async def get_todos_by_priority(priority: int, db: Session = Depends(get_db)):
+@app.get("/todos/priority/{priority}", response_model=None, responses=TODO_LIST_RESPONSES)
+async def get_todos_by_priority(priority: int, db: AsyncSession = Depends(get_db)):
     if priority < 0 or priority > 2:
         raise HTTPException(status_code=400, detail="Invalid priority")
-    todos = db.query(Todo).filter(Todo.priority == priority).order_by(Todo.created_at.desc()).all()
-    return todos
+    todos = await db.scalars(select(Todo).where(Todo.priority == priority).order_by(Todo.created_at.desc()))
+    return todo_list_response(todos)
 
 @app.get("/todos/{todo_id}", response_model=TodoResponse)
-async def get_todo(todo_id: int, db: Session = Depends(get_db)):
-    todo = db.query(Todo).filter(Todo.id == todo_id).first()
+async def get_todo(todo_id: int, db: AsyncSession = Depends(get_db)):
+    todo = await db.scalar(select(Todo).where(Todo.id == todo_id))
     if todo is None:
         raise HTTPException(status_code=404, detail="Todo not found")
     return todo
 
 @app.put("/todos/{todo_id}", response_model=TodoResponse)
-async def update_todo(todo_id: int, todo_update: TodoUpdate, db: Session = Depends(get_db)):
-    todo = db.query(Todo).filter(Todo.id == todo_id).first()
+async def update_todo(todo_id: int, todo_update: TodoUpdate, db: AsyncSession = Depends(get_db)):
+    todo = await db.scalar(select(Todo).where(Todo.id == todo_id))
     if todo is None:
         raise HTTPException(status_code=404, detail="Todo not found")
     
@@ -150,18 +215,18 @@ async def update_todo(todo_id: int, todo_update: TodoUpdate, db: Session = Depen
         setattr(todo, field, value)
     
     todo.updated_at = datetime.now()
-    db.commit()
-    db.refresh(todo)
+    await db.commit()
+    await db.refresh(todo)
     return todo
 
 @app.delete("/todos/{todo_id}")
-async def delete_todo(todo_id: int, db: Session = Depends(get_db)):
-    todo = db.query(Todo).filter(Todo.id == todo_id).first()
+async def delete_todo(todo_id: int, db: AsyncSession = Depends(get_db)):
+    todo = await db.scalar(select(Todo).where(Todo.id == todo_id))
     if todo is None:
         raise HTTPException(status_code=404, detail="Todo not found")
     
-    db.delete(todo)
-    db.commit()
+    await db.delete(todo)
+    await db.commit()
     return {"message": "Todo deleted successfully"}
 
 # AI-powered todo generation endpoint
@@ -0,0 +1,166 @@
+"""
+Semantic Cache for Todo Generation
+
+Reuses generated todos for paraphrased inputs ("buy milk" / "get milk") by
+comparing sentence embeddings of the user input. Embeddings come from a local
+MiniLM model run with onnxruntime; numpy, onnxruntime and tokenizers are
+optional dependencies that are only imported when the cache is enabled.
+"""
+
+import logging
+import os
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Cosine similarity above which a cached result is reused
+SIMILARITY_THRESHOLD = 0.92
+
+# Maximum number of cached inputs; the least recently used entry is evicted
+SEMANTIC_CACHE_SIZE = 10_000
+
+# Maximum number of missed inputs whose embedding is kept until set() stores their result
+PENDING_EMBEDDINGS = 1_024
+
+# Embedding size of all-MiniLM-L6-v2
+EMBEDDING_DIM = 384
+
+# Preferred model files in the model directory; the int8 export is ~4x smaller and faster
+MODEL_FILES = ("model_quantized.onnx", "model.onnx")
+
+class OnnxEmbedder:
+    """
+    Sentence embedder for an exported MiniLM model
+
+    Uses the int8 model_quantized.onnx written by export_embedding_model.py
+    when present, falling back to the FP32 model.onnx.
+    """
+
+    def __init__(self, model_dir: str):
+        import numpy as np
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self._np = np
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=128)
+        model_path = next(
+            (os.path.join(model_dir, name) for name in MODEL_FILES if os.path.exists(os.path.join(model_dir, name))),
+            None
+        )
+        if model_path is None:
+            raise FileNotFoundError(f"No ONNX model found in {model_dir}")
+
+        # Inputs are embedded one at a time, so a single intra-op thread avoids
+        # thread-pool overhead on such small matrices
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = 1
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    def __call__(self, text: str):
+        """Embed one input: mean-pool the token embeddings and L2-normalize"""
+        np = self._np
+        encoding = self.tokenizer.encode(text)
+        input_ids = np.array([encoding.ids], dtype=np.int64)
+        attention_mask = np.array([encoding.attention_mask], dtype=np.int64)
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.array([encoding.type_ids], dtype=np.int64)
+
+        token_embeddings = self.session.run(None, feeds)[0][0]
+        mask = attention_mask[0][:, None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=0) / max(mask.sum(), 1.0)
+        return (pooled / (np.linalg.norm(pooled) or 1.0)).astype(np.float32)
+
+@lru_cache(maxsize=None)
+def load_embedder(model_dir: str) -> OnnxEmbedder:
+    """Load an embedder once per model directory"""
+    logger.info(f"Loading semantic cache embedding model from {model_dir}")
+    return OnnxEmbedder(model_dir)
+
+class SemanticCache:
+    """
+    In-memory nearest-neighbour cache over normalized input embeddings
+
+    Vectors live in one preallocated matrix, so a lookup is a single
+    matrix-vector product (exact inner-product search, like a flat FAISS index).
+    """
+
+    def __init__(self, embed: Callable[[str], Any], threshold: float = SIMILARITY_THRESHOLD,
+                 maxsize: int = SEMANTIC_CACHE_SIZE, dim: int = EMBEDDING_DIM):
+        import numpy as np
+
+        self._np = np
+        self.embed = embed
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self._vectors = np.zeros((maxsize, dim), dtype=np.float32)
+        self._last_used = np.zeros(maxsize, dtype=np.int64)
+        self._values: List[Any] = []
+        self._pending: "OrderedDict[str, Any]" = OrderedDict()
+        self._clock = 0
+
+    def _tick(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    def get(self, user_input: str, vector: Any = None) -> Optional[Tuple[Any, float]]:
+        """
+        Return the (value, similarity) of the closest cached input above the threshold
+
+        Pass the input's precomputed embedding as vector to keep embedding off the caller's thread.
+        """
+        if vector is None:
+            vector = self.embed(user_input)
+        if self._values:
+            scores = self._vectors[:len(self._values)] @ vector
+            best = int(scores.argmax())
+            if scores[best] >= self.threshold:
+                self._last_used[best] = self._tick()
+                return self._values[best], float(scores[best])
+
+        # Keep the embedding of a miss so storing the generated result doesn't embed again
+        self._pending[user_input] = vector
+        if len(self._pending) > PENDING_EMBEDDINGS:
+            self._pending.popitem(last=False)
+        return None
+
+    def pop_pending(self, user_input: str) -> Optional[Any]:
+        """Take the embedding kept from a missed get() for this input, if still held"""
+        return self._pending.pop(user_input, None)
+
+    def set(self, user_input: str, value: Any, vector: Any = None) -> None:
+        """Store a value for an input, evicting the least recently used entry when full"""
+        if vector is None:
+            vector = self.pop_pending(user_input)
+        if vector is None:
+            vector = self.embed(user_input)
+
+        if len(self._values) < self.maxsize:
+            slot = len(self._values)
+            self._values.append(value)
+        else:
+            slot = int(self._last_used.argmin())
+            self._values[slot] = value
+
+        self._vectors[slot] = vector
+        self._last_used[slot] = self._tick()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+def create_semantic_cache(model_dir: Optional[str]) -> Optional[SemanticCache]:
+    """Build a semantic cache for the configured model, or None if disabled or unavailable"""
+    if not model_dir:
+        return None
+
+    try:
+        return SemanticCache(load_embedder(model_dir))
+    except Exception as e:
+        logger.warning(f"Semantic cache disabled: {str(e)}")
+        return None
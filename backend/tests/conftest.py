@@ -3,60 +3,148 @@ Shared test configuration and fixtures for Todo App Backend tests
 """
 
 import os
-import tempfile
+import asyncio
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from main import app, get_db, Base
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+try:
+    import uvloop
+except ImportError:  # uvloop comes with uvicorn[standard] everywhere but Windows
+    uvloop = None
+
+# Point the app's own engine at a throwaway in-memory database: the shared
+# TestClient runs the app lifespan, which creates the schema on that engine
+os.environ["DATABASE_URL"] = "sqlite://"
+
+from main import app, get_db, create_schema, Todo
+from ai_service import AITodoService, ai_service
+
+@pytest.fixture(scope="session")
+def event_loop():
+    """One event loop for all async tests instead of a new loop per test"""
+    loop = uvloop.new_event_loop() if uvloop else asyncio.new_event_loop()
+    yield loop
+    loop.close()
 
-# Create a temporary test database
 @pytest.fixture(scope="session")
-def test_db_path():
-    """Create a temporary database file for testing"""
-    with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as tmp:
-        return tmp.name
+async def test_engine():
+    """Create the in-memory test database and its schema once per session"""
+    # StaticPool hands every session the same connection, so the whole run
+    # sees one in-memory database; it vanishes when the engine is disposed
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+
+    # Let SQLAlchemy emit BEGIN itself so SAVEPOINTs work with the sqlite driver
+    @event.listens_for(engine.sync_engine, "connect")
+    def disable_driver_transactions(dbapi_conn, connection_record):
+        dbapi_conn.isolation_level = None
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+    async with engine.begin() as conn:
+        await conn.run_sync(create_schema)
+
+    yield engine
+    await engine.dispose()
 
 @pytest.fixture(scope="function")
-def test_db(test_db_path):
-    """Create a fresh test database for each test"""
-    # Create engine with the temporary database
-    engine = create_engine(f"sqlite:///{test_db_path}", connect_args={"check_same_thread": False})
-    
-    # Create test database tables
-    Base.metadata.create_all(bind=engine)
-    
-    # Create session
-    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    db = TestingSessionLocal()
-    
-    yield db
-    
-    # Clean up after test
-    db.close()
-    Base.metadata.drop_all(bind=engine)
-    engine.dispose()
+async def test_connection(test_engine):
+    """Connection with an outer transaction that is rolled back after each test"""
+    conn = await test_engine.connect()
+    await conn.begin()
+    yield conn
+    await conn.rollback()
+    await conn.close()
+
+def make_test_session(conn) -> AsyncSession:
+    """Session joined to the test transaction; its commits only release a SAVEPOINT"""
+    return AsyncSession(bind=conn, autoflush=False, expire_on_commit=False,
+                        join_transaction_mode="create_savepoint")
+
+@pytest.fixture(scope="function")
+async def test_db(test_connection):
+    """Database session inside the per-test transaction"""
+    async with make_test_session(test_connection) as db:
+        yield db
 
 @pytest.fixture(scope="function")
-def client(test_db):
-    """Create a test client with database override"""
-    def override_get_db():
-        try:
-            yield test_db
-        finally:
-            pass  # Don't close here, let test_db fixture handle it
+async def seeded_todo(test_db):
+    """Todo inserted directly through the session, bypassing the HTTP API"""
+    todo = Todo(title="Test Todo")
+    test_db.add(todo)
+    await test_db.commit()
+    return todo
+
+
+@pytest.fixture(scope="function")
+async def seeded_priorities(test_db):
+    """One todo per priority level, inserted in a single commit"""
+    todos = [Todo(title=f"{label} Priority Todo", priority=priority)
+             for priority, label in enumerate(("Low", "Medium", "High"))]
+    test_db.add_all(todos)
+    await test_db.commit()
+    return todos
+
+@pytest.fixture(scope="session")
+def app_client():
+    """Single TestClient shared by the whole test session"""
+    # Entering the client keeps one event loop thread alive for every request
+    # instead of starting a new one per request
+    with TestClient(app, backend_options={"use_uvloop": uvloop is not None}) as client:
+        yield client
+
+@pytest.fixture(scope="function")
+def client(app_client, test_connection):
+    """Test client with the database override for the current test"""
+    async def override_get_db():
+        async with make_test_session(test_connection) as db:
+            yield db
     
     app.dependency_overrides[get_db] = override_get_db
-    yield TestClient(app)
+    yield app_client
     app.dependency_overrides.clear()
 
-@pytest.fixture(autouse=True)
-def cleanup_test_db(test_db_path):
-    """Clean up test database after each test"""
-    yield
-    # Clean up the temporary database file
-    if os.path.exists(test_db_path):
-        try:
-            os.unlink(test_db_path)
-        except OSError:
-            pass  # Ignore cleanup errors
+@pytest.fixture(scope="function")
+def todo_factory(app_client, test_connection):
+    """Callable that inserts a Todo with the given fields and returns its id"""
+    async def create_todo(fields) -> int:
+        async with make_test_session(test_connection) as db:
+            todo = Todo(**fields)
+            db.add(todo)
+            await db.commit()
+            return todo.id
+
+    # Insert on the TestClient's event loop, the one its requests use the connection from
+    def insert(**fields) -> int:
+        return app_client.portal.call(create_todo, fields)
+
+    return insert
+
+@pytest.fixture(scope="session")
+def ai_svc():
+    """Single AI service instance shared by the whole test session"""
+    # With AI_TEST_CACHE=1 the service tests use the app's own instance, so they
+    # share its response cache with the endpoint tests and a repeated input
+    # reaches the LLM only once per run. Keep it off when mocked tests run in
+    # the same session, as their mocked responses would be cached too.
+    if os.getenv("AI_TEST_CACHE") == "1":
+        return ai_service
+    return AITodoService()
+
+@pytest.fixture(scope="function")
+def mock_generate(monkeypatch):
+    """Stub ai_service.generate_todo; set "result" (or "error") before calling the endpoint"""
+    captured = {}
+
+    async def fake_generate_todo(request):
+        captured["request"] = request
+        if "error" in captured:
+            raise captured["error"]
+        return captured["result"]
+
+    monkeypatch.setattr(ai_service, "generate_todo", fake_generate_todo)
+    return captured
@@ -2,6 +2,11 @@
 Tests for main API endpoints
 """
 
+import pytest
+from sqlalchemy import inspect, select, text
+
+from main import Todo, create_schema
+
 def test_root(client):
     response = client.get("/")
     assert response.status_code == 200
@@ -33,34 +38,22 @@ def test_create_todo_with_priority(client):
     assert data["completed"] == False
     assert "id" in data
 
-def test_get_todos(client):
-    # Create a todo first
-    client.post("/todos", json={"title": "Test Todo"})
-    
+def test_get_todos(client, seeded_todo):
     response = client.get("/todos")
     assert response.status_code == 200
     data = response.json()
-    assert len(data) >= 1
+    assert len(data) == 1
     assert any(todo["title"] == "Test Todo" for todo in data)
 
-def test_get_todo(client):
-    # Create a todo first
-    create_response = client.post("/todos", json={"title": "Test Todo"})
-    todo_id = create_response.json()["id"]
-    
-    response = client.get(f"/todos/{todo_id}")
+def test_get_todo(client, seeded_todo):
+    response = client.get(f"/todos/{seeded_todo.id}")
     assert response.status_code == 200
     data = response.json()
     assert data["title"] == "Test Todo"
 
-def test_update_todo(client):
-    # Create a todo first
-    create_response = client.post("/todos", json={"title": "Test Todo"})
-    todo_id = create_response.json()["id"]
-    
-    # Update the todo
+def test_update_todo(client, seeded_todo):
     response = client.put(
-        f"/todos/{todo_id}",
+        f"/todos/{seeded_todo.id}",
         json={"title": "Updated Todo", "completed": True}
     )
     assert response.status_code == 200
@@ -68,16 +61,41 @@ def test_update_todo(client):
     assert data["title"] == "Updated Todo"
     assert data["completed"] == True
 
-def test_delete_todo(client):
-    # Create a todo first
-    create_response = client.post("/todos", json={"title": "Test Todo"})
-    todo_id = create_response.json()["id"]
-    
-    # Delete the todo
-    response = client.delete(f"/todos/{todo_id}")
+def test_delete_todo(client, seeded_todo):
+    response = client.delete(f"/todos/{seeded_todo.id}")
     assert response.status_code == 200
     assert response.json() == {"message": "Todo deleted successfully"}
     
     # Verify it's deleted
-    get_response = client.get(f"/todos/{todo_id}")
+    get_response = client.get(f"/todos/{seeded_todo.id}")
     assert get_response.status_code == 404
+
+
+async def test_todo_list_indexes(test_db):
+    conn = await test_db.connection()
+    indexes = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_indexes("todos"))
+    indexes = {index["name"]: index["column_names"] for index in indexes}
+    assert indexes["ix_todos_completed_created"] == ["completed", "created_at"]
+    assert indexes["ix_todos_priority_created"] == ["priority", "created_at"]
+    assert indexes["ix_todos_created_at"] == ["created_at"]
+
+async def test_schema_drops_legacy_title_index(test_db):
+    conn = await test_db.connection()
+    await conn.execute(text("CREATE INDEX ix_todos_title ON todos (title)"))
+    await conn.run_sync(create_schema)
+
+    indexes = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_indexes("todos"))
+    assert "ix_todos_title" not in {index["name"] for index in indexes}
+
+@pytest.mark.parametrize("condition,index", [
+    (Todo.completed == True, "ix_todos_completed_created"),
+    (Todo.priority == 2, "ix_todos_priority_created"),
+])
+async def test_list_filters_use_indexes(test_db, condition, index):
+    # The same statements the /todos/completed and /todos/priority endpoints run
+    query = select(Todo).where(condition).order_by(Todo.created_at.desc())
+    sql = query.compile(dialect=test_db.get_bind().dialect, compile_kwargs={"literal_binds": True})
+    result = await test_db.execute(text(f"EXPLAIN QUERY PLAN {sql}"))
+    plan = " ".join(row[-1] for row in result)
+    assert index in plan
+    assert "TEMP B-TREE" not in plan  # rows come back already sorted
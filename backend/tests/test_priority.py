@@ -2,50 +2,50 @@
 Tests for priority functionality
 """
 
-def test_todos_by_priority(client):
+import pytest
+
+def has_key(response, key):
+    """Check the raw JSON body contains a key, without decoding it"""
+    return f'"{key}"'.encode() in response.content
+
+@pytest.mark.parametrize("priority", [0, 1, 2])
+def test_todos_by_priority(client, seeded_priorities, priority):
     """Test filtering todos by priority level"""
-    # Create todos with different priorities
-    client.post("/todos", json={"title": "Low Priority Todo", "priority": 0})
-    client.post("/todos", json={"title": "Medium Priority Todo", "priority": 1})
-    client.post("/todos", json={"title": "High Priority Todo", "priority": 2})
-    
-    # Test filtering by priority 0
-    response = client.get("/todos/priority/0")
-    assert response.status_code == 200
-    data = response.json()
-    assert len(data) >= 1
-    assert all(todo["priority"] == 0 for todo in data)
-    
-    # Test filtering by priority 2
-    response = client.get("/todos/priority/2")
+    response = client.get(f"/todos/priority/{priority}")
     assert response.status_code == 200
     data = response.json()
-    assert len(data) >= 1
-    assert all(todo["priority"] == 2 for todo in data)
+    assert len(data) == 1
+    assert all(todo["priority"] == priority for todo in data)
 
-def test_invalid_priority_creation(client):
+@pytest.mark.parametrize("bad", [5, -1, 99])
+def test_invalid_priority_creation(client, bad):
     """Test validation of invalid priority values"""
-    response = client.post("/todos", json={"title": "Invalid Priority", "priority": 5})
+    response = client.post("/todos", json={"title": "Invalid Priority", "priority": bad})
     assert response.status_code == 422  # Validation error
-    assert "detail" in response.json()
+    assert has_key(response, "detail")
 
-def test_invalid_priority_url(client):
+@pytest.mark.parametrize("bad", [5, -1, 99])
+def test_invalid_priority_url(client, bad):
     """Test validation of invalid priority in URL"""
-    response = client.get("/todos/priority/5")
+    response = client.get(f"/todos/priority/{bad}")
     assert response.status_code == 400
-    assert response.json()["detail"] == "Invalid priority"
+    assert response.content == b'{"detail":"Invalid priority"}'
 
-def test_priority_update(client):
+def test_priority_update(client, todo_factory):
     """Test updating todo priority"""
-    # Create a todo
-    create_response = client.post("/todos", json={"title": "Test Todo", "priority": 0})
-    todo_id = create_response.json()["id"]
+    todo_id = todo_factory(title="Test Todo", priority=0)
     
-    # Update priority
     response = client.put(f"/todos/{todo_id}", json={"priority": 2})
     assert response.status_code == 200
-    data = response.json()
-    assert data["priority"] == 2
+    assert response.json()["priority"] == 2
+
+@pytest.mark.parametrize("bad", [5, -1, 99])
+def test_invalid_priority_update(client, todo_factory, bad):
+    """Test validation of invalid priority values on update"""
+    todo_id = todo_factory(title="Test Todo", priority=0)
+    
+    response = client.put(f"/todos/{todo_id}", json={"priority": bad})
+    assert response.status_code == 422  # Validation error
 
 def test_completed_todos_filter(client):
     """Test filtering completed todos"""
@@ -57,5 +57,5 @@ def test_completed_todos_filter(client):
     response = client.get("/todos/completed")
     assert response.status_code == 200
     data = response.json()
-    assert len(data) >= 1
-    assert all(todo["completed"] == True for todo in data)
\ No newline at end of file
+    assert len(data) == 1
+    assert all(todo["completed"] == True for todo in data)
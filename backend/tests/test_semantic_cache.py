@@ -0,0 +1,113 @@
+"""
+Tests for the semantic (embedding similarity) cache
+"""
+
+import threading
+import pytest
+from unittest.mock import patch
+
+np = pytest.importorskip("numpy")
+
+from ai_service import AITodoService, TodoGenerationRequest
+from semantic_cache import SemanticCache, create_semantic_cache
+
+VOCABULARY = ["buy", "get", "milk", "call", "mom", "tonight", "fix", "server", "the"]
+SYNONYMS = {"get": "buy"}
+
+def fake_embed(text):
+    """Bag-of-words embedding that treats "get" and "buy" as the same word"""
+    vector = np.zeros(len(VOCABULARY), dtype=np.float32)
+    for word in text.lower().split():
+        word = SYNONYMS.get(word, word)
+        if word in VOCABULARY:
+            vector[VOCABULARY.index(word)] += 1
+    return vector / (np.linalg.norm(vector) or 1.0)
+
+def make_cache(**kwargs):
+    return SemanticCache(fake_embed, dim=len(VOCABULARY), **kwargs)
+
+@pytest.mark.ai_mock
+class TestSemanticCache:
+    """Test cases for SemanticCache"""
+
+    def test_paraphrase_hits(self):
+        cache = make_cache()
+        cache.set("buy milk tonight", "milk-todo")
+
+        value, similarity = cache.get("get milk tonight")
+        assert value == "milk-todo"
+        assert similarity == pytest.approx(1.0)
+
+    def test_unrelated_input_misses(self):
+        cache = make_cache()
+        cache.set("buy milk tonight", "milk-todo")
+
+        assert cache.get("fix the server") is None
+        assert make_cache().get("buy milk") is None
+
+    def test_least_recently_used_entry_evicted(self):
+        cache = make_cache(maxsize=2)
+        cache.set("buy milk", "milk")
+        cache.set("call mom", "mom")
+        cache.get("buy milk")
+        cache.set("fix server", "server")
+
+        assert len(cache) == 2
+        assert cache.get("buy milk")[0] == "milk"
+        assert cache.get("call mom") is None
+
+    def test_miss_embedding_reused_when_storing(self):
+        """Test an input that missed is embedded once across get() and set()"""
+        embedded = []
+
+        def counting_embed(text):
+            embedded.append(text)
+            return fake_embed(text)
+
+        cache = SemanticCache(counting_embed, dim=len(VOCABULARY))
+        assert cache.get("buy milk tonight") is None
+        cache.set("buy milk tonight", "milk-todo")
+
+        assert embedded == ["buy milk tonight"]
+        assert cache.get("get milk tonight")[0] == "milk-todo"
+
+    def test_disabled_without_model(self):
+        assert create_semantic_cache(None) is None
+        assert create_semantic_cache("/nonexistent/model") is None
+
+    async def test_service_serves_paraphrase_from_semantic_cache(self):
+        """Test a paraphrased input skips the LLM once a similar input was generated"""
+        service = AITodoService()
+        service.semantic_cache = make_cache()
+        with patch.object(service, 'providers', ['mock_provider']):
+            with patch.object(service, '_call_llm') as mock_call:
+                mock_call.return_value = '{"title": "Buy milk", "description": "Tonight", "priority": 0}'
+
+                first = await service.generate_todo(TodoGenerationRequest(user_input="buy milk tonight"))
+                second = await service.generate_todo(TodoGenerationRequest(user_input="get milk tonight"))
+
+                assert mock_call.call_count == 1
+                assert first.provider_used == "mock_provider"
+                assert second.title == "Buy milk"
+                assert second.provider_used == "semantic-cache"
+
+                repeat = await service.generate_todo(TodoGenerationRequest(user_input="get milk tonight"))
+                assert mock_call.call_count == 1
+                assert repeat.provider_used == "semantic-cache"
+
+    async def test_service_embeds_off_the_event_loop(self):
+        """Test the service runs the embedding model in a worker thread, once per generated input"""
+        embed_threads = []
+
+        def recording_embed(text):
+            embed_threads.append(threading.get_ident())
+            return fake_embed(text)
+
+        service = AITodoService()
+        service.semantic_cache = SemanticCache(recording_embed, dim=len(VOCABULARY))
+        with patch.object(service, 'providers', ['mock_provider']):
+            with patch.object(service, '_call_llm', return_value='{"title": "Fix the server", "description": null, "priority": 2}'):
+                await service.generate_todo(TodoGenerationRequest(user_input="fix the server tonight please"))
+
+        assert len(embed_threads) == 1
+        assert threading.get_ident() not in embed_threads